@@ -3,25 +3,34 @@ Cryptographic utilities for Sekure password manager."""
 import os
 import base64
 import hashlib
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives import hashes
+import hmac
+
+from argon2 import PasswordHasher
+from argon2.exceptions import Argon2Error, InvalidHashError, VerifyMismatchError
 
 ITERATIONS = 600_000  # OWASP recommended minimum for PBKDF2-SHA256
 
+# Argon2id for the server-side verification hash: memory-hard, so GPU/ASIC
+# rigs lose their edge over the PBKDF2-SHA256 it replaces. 64 MiB keeps the
+# derivation inside the serverless function memory budget while still being
+# expensive to parallelize. The client-side encryption key stays on PBKDF2
+# (it must mirror the WebCrypto derivation in the frontend); only the
+# verifier stored in the DB changes.
+_ARGON2 = PasswordHasher(time_cost=3, memory_cost=64 * 1024, parallelism=2, hash_len=32)
 
-def derive_key(master_password: str, salt: bytes) -> bytes:
-    """Derive a 256-bit key from master password using PBKDF2-HMAC-SHA256."""
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=ITERATIONS,
-    )
-    return kdf.derive(master_password.encode("utf-8"))
+def hash_master_password(master_password: str, salt: bytes) -> str:
+    """Hash the master password for verification (separate from encryption key).
 
+    Produces an Argon2id PHC string; the salt and parameters travel inside
+    it, so verify_master_password needs no external state to check it. The
+    salt argument is kept for call-site compatibility (it still seeds the
+    client-mirroring key derivation) but Argon2 draws its own salt.
+    """
+    return _ARGON2.hash(master_password)
 
-def hash_master_password(master_password: str, salt: bytes) -> str:
-    """Hash the master password for verification (separate from encryption key)."""
+
+def _legacy_hash_master_password(master_password: str, salt: bytes) -> str:
+    """PBKDF2 verifier used before the Argon2id migration."""
     verification_key = hashlib.pbkdf2_hmac(
         "sha256",
         master_password.encode("utf-8"),
@@ -32,9 +41,55 @@ def hash_master_password(master_password: str, salt: bytes) -> str:
 
 
 def verify_master_password(master_password: str, salt: bytes, stored_hash: str) -> bool:
-    """Verify the master password against stored hash."""
-    computed = hash_master_password(master_password, salt)
-    return computed == stored_hash
+    """Verify the master password against stored hash (constant-time).
+
+    Accepts both Argon2id hashes and the legacy PBKDF2 verifier, so
+    pre-migration accounts keep working; pair with needs_rehash() to
+    upgrade those on a successful login.
+    """
+    if stored_hash.startswith("$argon2"):
+        try:
+            return _ARGON2.verify(stored_hash, master_password)
+        except (VerifyMismatchError, InvalidHashError, Argon2Error):
+            return False
+    computed = _legacy_hash_master_password(master_password, salt)
+    return hmac.compare_digest(computed, stored_hash)
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    """Whether a stored verifier should be re-hashed with current parameters.
+
+    Legacy PBKDF2 verifiers always qualify; Argon2id hashes qualify when
+    their embedded parameters fall behind the configured ones.
+    """
+    if not stored_hash.startswith("$argon2"):
+        return True
+    return _ARGON2.check_needs_rehash(stored_hash)
+
+
+# Server-side secret (pepper) mixed into recovery-code hashes. With it set,
+# a leaked database alone is not enough for an offline brute-force of the
+# ~80-bit codes — the attacker also needs the deployment environment. Empty
+# default keeps dev setups working without extra configuration.
+_PEPPER = os.getenv("SEKURE_PEPPER", "").encode("utf-8")
+
+
+def hash_recovery_code(code: str) -> str:
+    """Hash a recovery code with HMAC-SHA256 keyed by SEKURE_PEPPER."""
+    return hmac.new(_PEPPER, code.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def verify_recovery_code(code: str, stored_hash: str) -> bool:
+    """Check a recovery code against its stored hash (constant-time).
+
+    Also accepts the legacy unkeyed sha256 format so codes issued before
+    the pepper migration keep working; recovery rotates the code, so the
+    stored hash upgrades on first use.
+    """
+    if hmac.compare_digest(hash_recovery_code(code), stored_hash):
+        return True
+    legacy = hashlib.sha256(code.encode("utf-8")).hexdigest()
+    return hmac.compare_digest(legacy, stored_hash)
 
 
 def generate_salt() -> bytes:
@@ -15,17 +15,28 @@ if _is_turso:
     if url.startswith("libsql://"):
         url = "sqlite+libsql://" + url[len("libsql://"):]
 
+    # Turso connections go over HTTP; pool them so each request reuses an
+    # established connection instead of paying a new handshake.
     engine = create_engine(
         url,
         connect_args={"auth_token": DATABASE_PASSWORD, "check_same_thread": False},
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        # Large enough that the app's full statement mix stays compiled
+        # (default 500 starts evicting once the per-endpoint variants add up).
+        query_cache_size=1200,
     )
 else:
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread": False},
+        query_cache_size=1200,
     )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False keeps ORM objects readable after commit, so
+# handlers can serialize what they just wrote without a refresh SELECT.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 
 class Base(DeclarativeBase):
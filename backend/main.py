@@ -1,15 +1,22 @@
 """
 Sekure - Secure Password Manager API (Multi-user)
 """
-import base64
+import asyncio
 import hashlib
 import os
 import secrets
 from datetime import datetime, timedelta, timezone
+from binascii import a2b_base64 as _b64decode, b2a_base64 as _b64encode
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends, HTTPException, Header, status
+from typing import NamedTuple
+from cachetools import TTLCache
+from fastapi import FastAPI, Depends, HTTPException, Header, Response, status
+from pydantic import TypeAdapter
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session, joinedload
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import and_, bindparam, delete, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from database import engine, get_db, Base
 from models import User, UserSession, Password, Tag, password_tags, Group, GroupMember, GroupPassword, GroupInvitation, SharedLink
@@ -27,36 +34,164 @@ from schemas import (
 )
 from crypto import (
     generate_salt, hash_master_password,
-    verify_master_password,
+    verify_master_password, needs_rehash,
+    hash_recovery_code, verify_recovery_code,
 )
 from password_utils import (
     generate_password, calculate_entropy, calculate_entropy_breakdown,
     get_char_distribution, estimate_crack_time, get_strength_label,
-    analyze_password, check_hibp,
+    analyze_password, char_classes, check_hibp, close_hibp_client, SYMBOLS_SET,
 )
 
+# Built once at import: TypeAdapter validates a whole list in pydantic-core
+# instead of spinning up one model validation per element.
+_TAG_LIST_ADAPTER = TypeAdapter(list[TagOut])
+
 # --- DB-backed session helper ---
-def _load_session(token: str, db: Session) -> dict | None:
-    """Load session from database, return dict with user_id, username or None."""
+
+# Sessions expire server-side after this many hours (default 30 days).
+SESSION_TTL = timedelta(hours=int(os.getenv("SESSION_TTL_HOURS", "720")))
+
+
+def _make_recovery_code() -> str:
+    """Generate a recovery code formatted as XXXX-XXXX-XXXX-XXXX-XXXX."""
+    r = secrets.token_hex(10).upper()  # 20 hex chars
+    return f"{r[0:4]}-{r[4:8]}-{r[8:12]}-{r[12:16]}-{r[16:20]}"
+
+
+def _hash_token(token: str) -> str:
+    """Sessions are stored under sha256(token) so a DB leak or memory dump
+    never exposes usable bearer tokens."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class SessionContext(NamedTuple):
+    """Authenticated session data threaded through request handlers.
+
+    A NamedTuple instead of a dict: attribute access compiles to an index
+    lookup, the object is immutable (safe to share via the session cache)
+    and smaller than a per-request dict. Carries the token *hash*, never
+    the bearer token itself.
+    """
+    token_hash: str
+    user_id: int
+    username: str
+    is_kids_account: bool
+
+
+# Session data is immutable between login and logout, so authenticated
+# requests can skip the per-request SELECT. Keyed by sha256(token) — same
+# as the DB rows — so the cache never holds usable bearer tokens; the TTL
+# bounds staleness if another worker revokes the DB row.
+_SESSION_CACHE = TTLCache(maxsize=10_000, ttl=300)
+
+
+def _evict_user_sessions(user_id: int) -> None:
+    """Drop cached sessions for a user whose DB sessions were just revoked."""
+    stale = [tok for tok, data in _SESSION_CACHE.items() if data.user_id == user_id]
+    for tok in stale:
+        _SESSION_CACHE.pop(tok, None)
+
+
+def _load_session(token: str, db: Session) -> SessionContext | None:
+    """Load session context from the cache or database, or None if invalid."""
+    token_hash = _hash_token(token)
+    cached = _SESSION_CACHE.get(token_hash)
+    if cached is not None:
+        return cached
     sess = (
         db.query(UserSession)
         .options(joinedload(UserSession.user))
-        .filter(UserSession.token == token)
+        .filter(UserSession.token == token_hash)
         .first()
     )
     if not sess:
         return None
-    return {
-        "user_id": sess.user_id,
-        "username": sess.username,
-        "is_kids_account": bool(sess.user.is_kids_account) if sess.user else False,
-    }
+    if sess.created_at.replace(tzinfo=timezone.utc) + SESSION_TTL < datetime.now(timezone.utc):
+        db.delete(sess)
+        db.commit()
+        return None
+    data = SessionContext(
+        token_hash=token_hash,
+        user_id=sess.user_id,
+        username=sess.username,
+        is_kids_account=bool(sess.user.is_kids_account) if sess.user else False,
+    )
+    _SESSION_CACHE[token_hash] = data
+    return data
+
+
+# --- Full-text search over vault metadata ---
+
+# FTS5 index on title/username/url (external content table, so ciphertext
+# never enters the index). Kept in sync by triggers; searches fall back to
+# ILIKE when the SQLite build lacks FTS5.
+_FTS_ENABLED = False
+
+_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS password_fts USING fts5(
+        title, username, url, content='passwords', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS password_fts_ai AFTER INSERT ON passwords BEGIN
+        INSERT INTO password_fts(rowid, title, username, url)
+        VALUES (new.id, new.title, new.username, new.url);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS password_fts_ad AFTER DELETE ON passwords BEGIN
+        INSERT INTO password_fts(password_fts, rowid, title, username, url)
+        VALUES ('delete', old.id, old.title, old.username, old.url);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS password_fts_au AFTER UPDATE ON passwords BEGIN
+        INSERT INTO password_fts(password_fts, rowid, title, username, url)
+        VALUES ('delete', old.id, old.title, old.username, old.url);
+        INSERT INTO password_fts(rowid, title, username, url)
+        VALUES (new.id, new.title, new.username, new.url);
+    END""",
+)
+
+
+def _setup_fts() -> bool:
+    try:
+        with engine.begin() as conn:
+            existed = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'password_fts'"
+            )).first() is not None
+            for stmt in _FTS_DDL:
+                conn.execute(text(stmt))
+            if not existed:
+                # Index rows that predate the FTS table (one-time cost).
+                conn.execute(text("INSERT INTO password_fts(password_fts) VALUES ('rebuild')"))
+        return True
+    except Exception:
+        return False
+
+
+def _fts_match_ids(db: Session, search: str) -> list[int] | None:
+    """Resolve a search string to matching password ids via the FTS5 index.
+
+    The input is wrapped as a quoted prefix term so FTS5 query syntax in
+    user input cannot break the statement. Returns None when FTS is
+    unavailable, letting the caller fall back to ILIKE.
+    """
+    if not _FTS_ENABLED:
+        return None
+    term = '"{}"*'.format(search.replace('"', '""'))
+    try:
+        rows = db.execute(
+            text("SELECT rowid FROM password_fts WHERE password_fts MATCH :q"),
+            {"q": term},
+        )
+        return [row[0] for row in rows]
+    except Exception:
+        return None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global _FTS_ENABLED
     Base.metadata.create_all(bind=engine)
+    _FTS_ENABLED = _setup_fts()
     yield
+    await close_hibp_client()
 
 
 app = FastAPI(
@@ -64,51 +199,73 @@ app = FastAPI(
     description="Gestor de contraseñas seguro — multi-usuario",
     version="2.0.0",
     lifespan=lifespan,
+    # orjson serializes responses (datetimes included) in C — the biggest
+    # win on the list endpoints, where JSON encoding dominates after the DB.
+    default_response_class=ORJSONResponse,
 )
 
+# Comma-separated origin list, e.g. "https://sekure.vercel.app,https://sekure.app".
+# The wildcard default keeps local/dev behavior; production deploys should set
+# explicit origins so the middleware can fast-path the allowed-origin check
+# (string comparison against a short list) instead of matching everything.
+_cors_origins = [o.strip() for o in os.getenv("CORS_ALLOW_ORIGINS", "*").split(",") if o.strip()]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=_cors_origins,
+    # Credentials are only meaningful (and spec-valid) with explicit origins.
+    allow_credentials="*" not in _cors_origins,
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type"],
 )
 
 
 # --- Auth dependency ---
+
+def _extract_token(authorization: str) -> str | None:
+    """Pull the token out of a 'Bearer <token>' header value.
+
+    Runs on every authenticated request, so it's a single slice compare
+    plus a slice instead of startswith/removeprefix re-scanning the prefix.
+    """
+    if authorization[:7] != "Bearer ":
+        return None
+    return authorization[7:]
+
+
 def get_current_session(authorization: str = Header(default=""), db: Session = Depends(get_db)):
     """Extract and validate the Bearer token, returning session data."""
-    if not authorization.startswith("Bearer "):
+    token = _extract_token(authorization)
+    if token is None:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "No autenticado. Inicia sesión.")
-    token = authorization.removeprefix("Bearer ")
     session_data = _load_session(token, db)
     if not session_data:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Sesión inválida o expirada.")
-    return {"token": token, **session_data}
+    return session_data
 
 
 # ==================== AUTH ====================
 
 @app.get("/api/auth/status")
 def auth_status(authorization: str = Header(default=""), db: Session = Depends(get_db)):
-    if not authorization.startswith("Bearer "):
+    token = _extract_token(authorization)
+    if token is None:
         return {"authenticated": False}
-    token = authorization.removeprefix("Bearer ")
     session_data = _load_session(token, db)
     if not session_data:
         return {"authenticated": False}
     return {
         "authenticated": True,
         "user": {
-            "id": session_data["user_id"],
-            "username": session_data["username"],
-            "is_kids_account": session_data.get("is_kids_account", False),
+            "id": session_data.user_id,
+            "username": session_data.username,
+            "is_kids_account": session_data.is_kids_account,
         },
     }
 
 
 @app.post("/api/auth/register")
-def register_user(data: UserRegister, db: Session = Depends(get_db)):
+async def register_user(data: UserRegister, db: Session = Depends(get_db)):
     if len(data.username.strip()) < 3:
         raise HTTPException(400, "El nombre de usuario debe tener al menos 3 caracteres.")
     pw = data.master_password
@@ -120,7 +277,7 @@ def register_user(data: UserRegister, db: Session = Depends(get_db)):
         raise HTTPException(400, "La contraseña debe incluir al menos una minúscula.")
     if not any(c.isdigit() for c in pw):
         raise HTTPException(400, "La contraseña debe incluir al menos un número.")
-    if not any(c in '!@#$%^&*()_+-=[]{}|;:,.<>?' for c in pw):
+    if SYMBOLS_SET.isdisjoint(pw):
         raise HTTPException(400, "La contraseña debe incluir al menos un carácter especial.")
 
     existing = db.query(User).filter(User.username == data.username.strip()).first()
@@ -128,13 +285,13 @@ def register_user(data: UserRegister, db: Session = Depends(get_db)):
         raise HTTPException(400, "El nombre de usuario ya está en uso.")
 
     salt = generate_salt()
-    password_hash = hash_master_password(data.master_password, salt)
-    salt_b64 = base64.b64encode(salt).decode("utf-8")
+    # PBKDF2 releases the GIL inside OpenSSL; run it off the event loop so
+    # concurrent registrations/logins scale across cores.
+    password_hash = await asyncio.to_thread(hash_master_password, data.master_password, salt)
+    salt_b64 = _b64encode(salt, newline=False).decode("ascii")
 
-    # Generate recovery code (format: XXXX-XXXX-XXXX-XXXX-XXXX)
-    raw_recovery = secrets.token_hex(10).upper()  # 20 hex chars
-    recovery_code = "-".join([raw_recovery[i:i+4] for i in range(0, 20, 4)])
-    recovery_hash = hashlib.sha256(recovery_code.encode()).hexdigest()
+    recovery_code = _make_recovery_code()
+    recovery_hash = hash_recovery_code(recovery_code)
 
     user = User(
         username=data.username.strip(),
@@ -147,13 +304,12 @@ def register_user(data: UserRegister, db: Session = Depends(get_db)):
 
     token = secrets.token_urlsafe(32)
     sess = UserSession(
-        token=token,
+        token=_hash_token(token),
         user_id=user.id,
         username=user.username,
     )
     db.add(sess)
     db.commit()
-    db.refresh(user)
 
     return {
         "token": token,
@@ -164,18 +320,23 @@ def register_user(data: UserRegister, db: Session = Depends(get_db)):
 
 
 @app.post("/api/auth/login")
-def login_user(data: UserLogin, db: Session = Depends(get_db)):
+async def login_user(data: UserLogin, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.username == data.username.strip()).first()
     if not user:
         raise HTTPException(401, "Usuario o contraseña incorrectos.")
 
-    salt = base64.b64decode(user.salt)
-    if not verify_master_password(data.master_password, salt, user.password_hash):
+    salt = _b64decode(user.salt)
+    if not await asyncio.to_thread(verify_master_password, data.master_password, salt, user.password_hash):
         raise HTTPException(401, "Usuario o contraseña incorrectos.")
 
+    # Lazily migrate legacy PBKDF2 verifiers (and outdated Argon2 parameters)
+    # now that we hold the plaintext password.
+    if needs_rehash(user.password_hash):
+        user.password_hash = await asyncio.to_thread(hash_master_password, data.master_password, salt)
+
     token = secrets.token_urlsafe(32)
     sess = UserSession(
-        token=token,
+        token=_hash_token(token),
         user_id=user.id,
         username=user.username,
     )
@@ -190,7 +351,7 @@ def login_user(data: UserLogin, db: Session = Depends(get_db)):
 
 
 @app.post("/api/auth/recover")
-def recover_account(data: RecoverRequest, db: Session = Depends(get_db)):
+async def recover_account(data: RecoverRequest, db: Session = Depends(get_db)):
     """Reset master password using recovery code. Re-encrypts nothing (vault is lost)."""
     if len(data.new_master_password) < 8:
         raise HTTPException(400, "La nueva contraseña debe tener al menos 8 caracteres.")
@@ -199,32 +360,32 @@ def recover_account(data: RecoverRequest, db: Session = Depends(get_db)):
     if not user or not user.recovery_code_hash:
         raise HTTPException(400, "Código de recuperación inválido.")
 
-    code_hash = hashlib.sha256(data.recovery_code.strip().upper().encode()).hexdigest()
-    if code_hash != user.recovery_code_hash:
+    if not verify_recovery_code(data.recovery_code.strip().upper(), user.recovery_code_hash):
         raise HTTPException(400, "Código de recuperación inválido.")
 
-    # Reset password and salt — old vault entries become unrecoverable
+    # Reset password and salt — old vault entries become unrecoverable.
+    # The Argon2 derivation releases the GIL; keep it off the event loop.
     new_salt = generate_salt()
-    new_hash = hash_master_password(data.new_master_password, new_salt)
-    new_salt_b64 = base64.b64encode(new_salt).decode("utf-8")
+    new_hash = await asyncio.to_thread(hash_master_password, data.new_master_password, new_salt)
+    new_salt_b64 = _b64encode(new_salt, newline=False).decode("ascii")
 
     user.password_hash = new_hash
     user.salt = new_salt_b64
 
     # Generate new recovery code
-    raw_recovery = secrets.token_hex(10).upper()
-    new_recovery_code = "-".join([raw_recovery[i:i+4] for i in range(0, 20, 4)])
-    user.recovery_code_hash = hashlib.sha256(new_recovery_code.encode()).hexdigest()
+    new_recovery_code = _make_recovery_code()
+    user.recovery_code_hash = hash_recovery_code(new_recovery_code)
 
     # Delete old vault (can't decrypt with new key)
     db.query(Password).filter(Password.user_id == user.id).delete()
     # Clear any existing sessions
     db.query(UserSession).filter(UserSession.user_id == user.id).delete()
+    _evict_user_sessions(user.id)
 
     # Create new session
     token = secrets.token_urlsafe(32)
     sess = UserSession(
-        token=token,
+        token=_hash_token(token),
         user_id=user.id,
         username=user.username,
     )
@@ -242,8 +403,9 @@ def recover_account(data: RecoverRequest, db: Session = Depends(get_db)):
 
 @app.post("/api/auth/logout")
 def logout_user(session=Depends(get_current_session), db: Session = Depends(get_db)):
-    db.query(UserSession).filter(UserSession.token == session["token"]).delete()
+    db.query(UserSession).filter(UserSession.token == session.token_hash).delete()
     db.commit()
+    _SESSION_CACHE.pop(session.token_hash, None)
     return {"message": "Sesión cerrada."}
 
 
@@ -280,16 +442,29 @@ def gen_password(data: GenerateRequest):
 @app.post("/api/passwords/check", response_model=CheckResponse)
 async def check_password(data: CheckRequest):
     password = data.password
-    entropy = calculate_entropy(password)
-    strength, score = get_strength_label(entropy)
-    crack_time = estimate_crack_time(entropy)
-    feedback = analyze_password(password)
-    char_dist = get_char_distribution(password)
-    breakdown = calculate_entropy_breakdown(password)
-    is_breached, breach_count = await check_hibp(password)
+
+    def _local_analysis():
+        # Classify once; entropy, distribution and breakdown share the array.
+        classes = char_classes(password)
+        entropy = calculate_entropy(password, classes)
+        strength, score = get_strength_label(entropy)
+        crack_time = estimate_crack_time(entropy)
+        feedback = analyze_password(password)
+        char_dist = get_char_distribution(password, classes)
+        breakdown = calculate_entropy_breakdown(password, classes)
+        return entropy, strength, score, crack_time, feedback, char_dist, breakdown
+
+    # The HIBP round-trip (~200-400ms) dominates this endpoint; overlap it
+    # with the CPU-side analysis so latency is max(network, CPU), not the sum.
+    (entropy, strength, score, crack_time, feedback, char_dist, breakdown), (is_breached, breach_count) = (
+        await asyncio.gather(asyncio.to_thread(_local_analysis), check_hibp(password))
+    )
 
     if is_breached:
-        feedback.insert(0, f"⚠️ ¡ALERTA! Esta contraseña ha aparecido en {breach_count:,} filtraciones de datos.")
+        if breach_count > 0:
+            feedback.insert(0, f"⚠️ ¡ALERTA! Esta contraseña ha aparecido en {breach_count:,} filtraciones de datos.")
+        else:
+            feedback.insert(0, "⚠️ ¡ALERTA! Esta contraseña ha aparecido en filtraciones de datos.")
 
     return CheckResponse(
         entropy=entropy,
@@ -308,27 +483,64 @@ async def check_password(data: CheckRequest):
 
 @app.get("/api/vault", response_model=list[VaultEntryOut])
 def list_vault(
+    response: Response,
     search: str = "",
     tag: str = "",
     favorites_only: bool = False,
+    limit: int = 0,
+    cursor: int = 0,
     session=Depends(get_current_session),
     db: Session = Depends(get_db),
 ):
-    user_id = session["user_id"]
-    query = db.query(Password).filter(Password.user_id == user_id)
+    user_id = session.user_id
+    # selectinload fetches all tags in one extra query instead of one lazy
+    # SELECT per serialized entry (N+1).
+    query = (
+        db.query(Password)
+        .options(selectinload(Password.tags))
+        .filter(Password.user_id == user_id)
+    )
 
     if search:
-        query = query.filter(
-            Password.title.ilike(f"%{search}%")
-            | Password.username.ilike(f"%{search}%")
-            | Password.url.ilike(f"%{search}%")
-        )
+        matched_ids = _fts_match_ids(db, search)
+        if matched_ids is not None:
+            query = query.filter(Password.id.in_(matched_ids))
+        else:
+            query = query.filter(
+                Password.title.ilike(f"%{search}%")
+                | Password.username.ilike(f"%{search}%")
+                | Password.url.ilike(f"%{search}%")
+            )
     if favorites_only:
-        query = query.filter(Password.is_favorite == True)
+        # IS TRUE matches the partial favorites index predicate exactly.
+        query = query.filter(Password.is_favorite.is_(True))
     if tag:
         tag_names = [t.strip() for t in tag.split(",") if t.strip()]
         if tag_names:
-            query = query.join(Password.tags).filter(Tag.name.in_(tag_names))
+            # EXISTS against the association table: resolves tag names to ids
+            # through the uq_user_tag_name index and — unlike the previous
+            # join — cannot duplicate entries matching several tags.
+            tag_ids = select(Tag.id).where(Tag.user_id == user_id, Tag.name.in_(tag_names))
+            query = query.filter(
+                db.query(password_tags)
+                .filter(
+                    password_tags.c.password_id == Password.id,
+                    password_tags.c.tag_id.in_(tag_ids),
+                )
+                .exists()
+            )
+
+    if limit > 0:
+        # Keyset pagination (opt-in): newest-first by id with the last seen
+        # id as cursor, so deep pages stay O(limit) instead of OFFSET scans.
+        # The next cursor travels in a header to keep the body shape intact.
+        if cursor > 0:
+            query = query.filter(Password.id < cursor)
+        entries = query.order_by(Password.id.desc()).limit(limit + 1).all()
+        if len(entries) > limit:
+            entries = entries[:limit]
+            response.headers["X-Next-Cursor"] = str(entries[-1].id)
+        return entries
 
     entries = query.order_by(Password.updated_at.desc()).all()
     return entries
@@ -340,7 +552,7 @@ def create_vault_entry(
     session=Depends(get_current_session),
     db: Session = Depends(get_db),
 ):
-    user_id = session["user_id"]
+    user_id = session.user_id
 
     # Client sends already-encrypted data (zero-knowledge)
     entry = Password(
@@ -354,30 +566,81 @@ def create_vault_entry(
         is_favorite=data.is_favorite or False,
     )
 
+    db.add(entry)
+
     if data.tag_ids:
-        tags = db.query(Tag).filter(Tag.id.in_(data.tag_ids), Tag.user_id == user_id).all()
-        entry.tags = tags
+        # Column-only select: validating ownership needs the ids, not
+        # hydrated Tag instances. Associations go straight into the table.
+        valid_ids = {
+            row[0]
+            for row in db.execute(
+                select(Tag.id).where(Tag.id.in_(data.tag_ids), Tag.user_id == user_id)
+            )
+        }
+        if valid_ids:
+            db.flush()
+            db.execute(
+                password_tags.insert(),
+                [{"password_id": entry.id, "tag_id": tag_id} for tag_id in valid_ids],
+            )
 
-    db.add(entry)
     db.commit()
-    db.refresh(entry)
     return entry
 
 
+@app.get("/api/vault/export", response_model=list[VaultEntryEncrypted])
+def export_vault(
+    session=Depends(get_current_session),
+    db: Session = Depends(get_db),
+):
+    """Return every entry with its ciphertext in one response.
+
+    Lets clients (vault export, bulk re-encryption) decrypt locally in a
+    single pass instead of fetching entries one request at a time.
+    """
+    user_id = session.user_id
+    entries = (
+        db.query(Password)
+        .options(selectinload(Password.tags))
+        .filter(Password.user_id == user_id)
+        .order_by(Password.updated_at.desc())
+        .all()
+    )
+    # model_construct: these fields come straight from our own rows, so the
+    # models are assembled without a validation pass (FastAPI still validates
+    # once against the response_model on the way out).
+    return [
+        VaultEntryEncrypted.model_construct(
+            id=entry.id,
+            title=entry.title,
+            username=entry.username,
+            url=entry.url,
+            notes=entry.notes,
+            is_favorite=entry.is_favorite,
+            created_at=entry.created_at,
+            updated_at=entry.updated_at,
+            tags=_TAG_LIST_ADAPTER.validate_python(entry.tags, from_attributes=True),
+            encrypted_password=entry.encrypted_password,
+            iv=entry.iv,
+        )
+        for entry in entries
+    ]
+
+
 @app.get("/api/vault/{entry_id}", response_model=VaultEntryEncrypted)
 def get_vault_entry(
     entry_id: int,
     session=Depends(get_current_session),
     db: Session = Depends(get_db),
 ):
-    user_id = session["user_id"]
+    user_id = session.user_id
 
     entry = db.query(Password).filter(Password.id == entry_id, Password.user_id == user_id).first()
     if not entry:
         raise HTTPException(404, "Entrada no encontrada.")
 
     # Return encrypted data — client decrypts locally (zero-knowledge)
-    return VaultEntryEncrypted(
+    return VaultEntryEncrypted.model_construct(
         id=entry.id,
         title=entry.title,
         username=entry.username,
@@ -386,7 +649,7 @@ def get_vault_entry(
         is_favorite=entry.is_favorite,
         created_at=entry.created_at,
         updated_at=entry.updated_at,
-        tags=[TagOut.model_validate(t) for t in entry.tags],
+        tags=_TAG_LIST_ADAPTER.validate_python(entry.tags, from_attributes=True),
         encrypted_password=entry.encrypted_password,
         iv=entry.iv,
     )
@@ -399,7 +662,7 @@ def update_vault_entry(
     session=Depends(get_current_session),
     db: Session = Depends(get_db),
 ):
-    user_id = session["user_id"]
+    user_id = session.user_id
 
     entry = db.query(Password).filter(Password.id == entry_id, Password.user_id == user_id).first()
     if not entry:
@@ -419,11 +682,39 @@ def update_vault_entry(
         entry.encrypted_password = data.encrypted_password
         entry.iv = data.iv
     if data.tag_ids is not None:
-        tags = db.query(Tag).filter(Tag.id.in_(data.tag_ids), Tag.user_id == user_id).all()
-        entry.tags = tags
+        # Diff the association table directly instead of loading Tag objects
+        # and reassigning entry.tags, which would delete + reinsert every row.
+        new_ids = set()
+        if data.tag_ids:
+            new_ids = {
+                row[0]
+                for row in db.execute(
+                    select(Tag.id).where(Tag.id.in_(data.tag_ids), Tag.user_id == user_id)
+                )
+            }
+        current_ids = {
+            row[0]
+            for row in db.execute(
+                select(password_tags.c.tag_id).where(password_tags.c.password_id == entry.id)
+            )
+        }
+        to_remove = current_ids - new_ids
+        to_add = new_ids - current_ids
+        if to_remove:
+            db.execute(
+                password_tags.delete().where(
+                    password_tags.c.password_id == entry.id,
+                    password_tags.c.tag_id.in_(to_remove),
+                )
+            )
+        if to_add:
+            db.execute(
+                password_tags.insert(),
+                [{"password_id": entry.id, "tag_id": tag_id} for tag_id in to_add],
+            )
+        db.expire(entry, ["tags"])
 
     db.commit()
-    db.refresh(entry)
     return entry
 
 
@@ -433,7 +724,7 @@ def delete_vault_entry(
     session=Depends(get_current_session),
     db: Session = Depends(get_db),
 ):
-    user_id = session["user_id"]
+    user_id = session.user_id
 
     entry = db.query(Password).filter(Password.id == entry_id, Password.user_id == user_id).first()
     if not entry:
@@ -450,7 +741,7 @@ def toggle_favorite(
     session=Depends(get_current_session),
     db: Session = Depends(get_db),
 ):
-    user_id = session["user_id"]
+    user_id = session.user_id
 
     entry = db.query(Password).filter(Password.id == entry_id, Password.user_id == user_id).first()
     if not entry:
@@ -465,7 +756,7 @@ def toggle_favorite(
 
 @app.get("/api/tags", response_model=list[TagOut])
 def list_tags(session=Depends(get_current_session), db: Session = Depends(get_db)):
-    user_id = session["user_id"]
+    user_id = session.user_id
     return db.query(Tag).filter(Tag.user_id == user_id).order_by(Tag.name).all()
 
 
@@ -475,7 +766,7 @@ def create_tag(
     session=Depends(get_current_session),
     db: Session = Depends(get_db),
 ):
-    user_id = session["user_id"]
+    user_id = session.user_id
 
     existing = db.query(Tag).filter(Tag.user_id == user_id, Tag.name == data.name).first()
     if existing:
@@ -484,7 +775,6 @@ def create_tag(
     tag = Tag(user_id=user_id, name=data.name, color=data.color or "#9b1b2f")
     db.add(tag)
     db.commit()
-    db.refresh(tag)
     return tag
 
 
@@ -494,7 +784,7 @@ def delete_tag(
     session=Depends(get_current_session),
     db: Session = Depends(get_db),
 ):
-    user_id = session["user_id"]
+    user_id = session.user_id
 
     tag = db.query(Tag).filter(Tag.id == tag_id, Tag.user_id == user_id).first()
     if not tag:
@@ -507,16 +797,49 @@ def delete_tag(
 
 # ==================== GROUPS ====================
 
+# Prebuilt with bindparams so every membership probe hits the same compiled-
+# statement cache slot instead of re-compiling a fresh Query each call.
+_MEMBER_STMT = (
+    select(GroupMember.id)
+    .where(GroupMember.group_id == bindparam("gid"), GroupMember.user_id == bindparam("uid"))
+    .limit(1)
+)
+
+
+def _is_member(db: Session, group_id: int, user_id: int) -> bool:
+    """Membership pre-check as an indexed single-row probe.
+
+    Cheaper than loading a GroupMember row just to test truthiness: the
+    query returns at most one id and stops at the uq_group_member index.
+    """
+    return db.execute(_MEMBER_STMT, {"gid": group_id, "uid": user_id}).first() is not None
+
+
+def _get_owned_group(db: Session, group_id: int, user_id: int, denied_detail: str) -> Group:
+    """Load a group while enforcing ownership in a single query.
+
+    The happy path (owner calling their own group) costs one SELECT. Only
+    on a miss does a lightweight id probe distinguish a missing group
+    (404) from a non-owner caller (403 with the endpoint's message).
+    """
+    group = db.query(Group).filter(Group.id == group_id, Group.owner_id == user_id).first()
+    if group is not None:
+        return group
+    if db.query(Group.id).filter(Group.id == group_id).first() is None:
+        raise HTTPException(404, "Grupo no encontrado.")
+    raise HTTPException(403, denied_detail)
+
+
 def _group_to_out(group: Group) -> GroupOut:
     """Convert a Group ORM object to GroupOut schema."""
-    return GroupOut(
+    return GroupOut.model_construct(
         id=group.id,
         name=group.name,
         owner_id=group.owner_id,
         owner_username=group.owner.username,
         created_at=group.created_at,
         members=[
-            GroupMemberOut(
+            GroupMemberOut.model_construct(
                 id=m.id,
                 user_id=m.user_id,
                 username=m.user.username,
@@ -530,25 +853,25 @@ def _group_to_out(group: Group) -> GroupOut:
 @app.get("/api/groups", response_model=list[GroupOut])
 def list_groups(session=Depends(get_current_session), db: Session = Depends(get_db)):
     """List all groups the user is a member of."""
-    user_id = session["user_id"]
-    memberships = db.query(GroupMember).filter(GroupMember.user_id == user_id).all()
-    group_ids = [m.group_id for m in memberships]
+    user_id = session.user_id
     groups = (
         db.query(Group)
-        .options(joinedload(Group.owner), joinedload(Group.members).joinedload(GroupMember.user))
-        .filter(Group.id.in_(group_ids))
+        .join(GroupMember, GroupMember.group_id == Group.id)
+        .filter(GroupMember.user_id == user_id)
+        # joinedload for the to-one owner; selectinload for the members
+        # collection so the result set isn't multiplied by member count.
+        .options(joinedload(Group.owner), selectinload(Group.members).joinedload(GroupMember.user))
         .order_by(Group.created_at.desc())
         .all()
-    ) if group_ids else []
+    )
     return [_group_to_out(g) for g in groups]
 
 
 @app.get("/api/groups/{group_id}/key")
 def get_group_key(group_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Get the group encryption key. Only members can access."""
-    user_id = session["user_id"]
-    is_member = db.query(GroupMember).filter(GroupMember.group_id == group_id, GroupMember.user_id == user_id).first()
-    if not is_member:
+    user_id = session.user_id
+    if not _is_member(db, group_id, user_id):
         raise HTTPException(403, "No eres miembro de este grupo.")
     group = db.query(Group).filter(Group.id == group_id).first()
     if not group:
@@ -559,28 +882,26 @@ def get_group_key(group_id: int, session=Depends(get_current_session), db: Sessi
 @app.post("/api/groups", response_model=GroupOut, status_code=201)
 def create_group(data: GroupCreate, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Create a new group. The creator becomes the owner and first member."""
-    user_id = session["user_id"]
+    user_id = session.user_id
 
     if not data.name.strip():
         raise HTTPException(400, "El nombre del grupo no puede estar vacío.")
 
     # Generate a random encryption key for the group vault
-    group_key = os.urandom(32)
-    group_key_b64 = base64.b64encode(group_key).decode("utf-8")
+    group_key = secrets.token_bytes(32)
+    group_key_b64 = _b64encode(group_key, newline=False).decode("ascii")
 
     group = Group(
         name=data.name.strip(),
         owner_id=user_id,
         encryption_key=group_key_b64,
     )
+    # Attach the owner membership through the relationship: the unit of work
+    # orders both INSERTs inside the commit's flush, so no mid-handler flush
+    # is needed to learn group.id and no post-commit SELECT follows.
+    group.members.append(GroupMember(user_id=user_id))
     db.add(group)
-    db.flush()  # get group.id
-
-    # Add owner as first member
-    member = GroupMember(group_id=group.id, user_id=user_id)
-    db.add(member)
     db.commit()
-    db.refresh(group)
 
     return _group_to_out(group)
 
@@ -590,7 +911,7 @@ def create_group(data: GroupCreate, session=Depends(get_current_session), db: Se
 @app.get("/api/groups/invitations/pending", response_model=list[GroupInvitationOut])
 def get_pending_invitations(session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Get all pending invitations for the current user."""
-    user_id = session["user_id"]
+    user_id = session.user_id
     invitations = (
         db.query(GroupInvitation)
         .options(joinedload(GroupInvitation.group), joinedload(GroupInvitation.inviter))
@@ -603,7 +924,7 @@ def get_pending_invitations(session=Depends(get_current_session), db: Session =
     )
 
     return [
-        GroupInvitationOut(
+        GroupInvitationOut.model_construct(
             id=inv.id,
             group_id=inv.group_id,
             group_name=inv.group.name,
@@ -618,7 +939,7 @@ def get_pending_invitations(session=Depends(get_current_session), db: Session =
 @app.post("/api/groups/invitations/{invitation_id}/accept")
 def accept_invitation(invitation_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Accept a group invitation."""
-    user_id = session["user_id"]
+    user_id = session.user_id
     invitation = db.query(GroupInvitation).filter(
         GroupInvitation.id == invitation_id,
         GroupInvitation.invitee_id == user_id,
@@ -637,7 +958,7 @@ def accept_invitation(invitation_id: int, session=Depends(get_current_session),
 @app.post("/api/groups/invitations/{invitation_id}/ignore")
 def ignore_invitation(invitation_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Ignore (reject) a group invitation."""
-    user_id = session["user_id"]
+    user_id = session.user_id
     invitation = db.query(GroupInvitation).filter(
         GroupInvitation.id == invitation_id,
         GroupInvitation.invitee_id == user_id,
@@ -656,12 +977,18 @@ def ignore_invitation(invitation_id: int, session=Depends(get_current_session),
 @app.get("/api/groups/{group_id}", response_model=GroupOut)
 def get_group(group_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Get group details. Must be a member."""
-    user_id = session["user_id"]
-    group = db.query(Group).filter(Group.id == group_id).first()
+    user_id = session.user_id
+    group = (
+        db.query(Group)
+        # _group_to_out walks owner and every member's user; load them up
+        # front instead of one lazy SELECT per touched relationship.
+        .options(joinedload(Group.owner), selectinload(Group.members).joinedload(GroupMember.user))
+        .filter(Group.id == group_id)
+        .first()
+    )
     if not group:
         raise HTTPException(404, "Grupo no encontrado.")
-    is_member = db.query(GroupMember).filter(GroupMember.group_id == group_id, GroupMember.user_id == user_id).first()
-    if not is_member:
+    if not _is_member(db, group_id, user_id):
         raise HTTPException(403, "No eres miembro de este grupo.")
     return _group_to_out(group)
 
@@ -669,12 +996,8 @@ def get_group(group_id: int, session=Depends(get_current_session), db: Session =
 @app.delete("/api/groups/{group_id}")
 def delete_group(group_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Delete a group. Only the owner can delete."""
-    user_id = session["user_id"]
-    group = db.query(Group).filter(Group.id == group_id).first()
-    if not group:
-        raise HTTPException(404, "Grupo no encontrado.")
-    if group.owner_id != user_id:
-        raise HTTPException(403, "Solo el creador puede eliminar el grupo.")
+    user_id = session.user_id
+    group = _get_owned_group(db, group_id, user_id, "Solo el creador puede eliminar el grupo.")
     db.delete(group)
     db.commit()
     return {"message": "Grupo eliminado."}
@@ -683,12 +1006,8 @@ def delete_group(group_id: int, session=Depends(get_current_session), db: Sessio
 @app.post("/api/groups/{group_id}/invite")
 def invite_to_group(group_id: int, data: GroupInvite, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Invite a user to a group. Only the owner can invite."""
-    user_id = session["user_id"]
-    group = db.query(Group).filter(Group.id == group_id).first()
-    if not group:
-        raise HTTPException(404, "Grupo no encontrado.")
-    if group.owner_id != user_id:
-        raise HTTPException(403, "Solo el creador puede invitar usuarios.")
+    user_id = session.user_id
+    _get_owned_group(db, group_id, user_id, "Solo el creador puede invitar usuarios.")
 
     invitee = db.query(User).filter(User.username == data.username.strip()).first()
     if not invitee:
@@ -697,10 +1016,7 @@ def invite_to_group(group_id: int, data: GroupInvite, session=Depends(get_curren
         raise HTTPException(400, "No puedes invitarte a ti mismo.")
 
     # Check if already a member
-    existing_member = db.query(GroupMember).filter(
-        GroupMember.group_id == group_id, GroupMember.user_id == invitee.id
-    ).first()
-    if existing_member:
+    if _is_member(db, group_id, invitee.id):
         raise HTTPException(400, "El usuario ya es miembro del grupo.")
 
     # Check if there's already a pending invitation
@@ -728,12 +1044,8 @@ def invite_to_group(group_id: int, data: GroupInvite, session=Depends(get_curren
 @app.post("/api/groups/{group_id}/kick/{target_user_id}")
 def kick_from_group(group_id: int, target_user_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Remove a user from a group. Only owner can kick."""
-    user_id = session["user_id"]
-    group = db.query(Group).filter(Group.id == group_id).first()
-    if not group:
-        raise HTTPException(404, "Grupo no encontrado.")
-    if group.owner_id != user_id:
-        raise HTTPException(403, "Solo el creador puede expulsar usuarios.")
+    user_id = session.user_id
+    _get_owned_group(db, group_id, user_id, "Solo el creador puede expulsar usuarios.")
     if target_user_id == user_id:
         raise HTTPException(400, "No puedes expulsarte a ti mismo.")
 
@@ -751,7 +1063,7 @@ def kick_from_group(group_id: int, target_user_id: int, session=Depends(get_curr
 @app.post("/api/groups/{group_id}/leave")
 def leave_group(group_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Leave a group. The owner cannot leave (must delete the group instead)."""
-    user_id = session["user_id"]
+    user_id = session.user_id
     group = db.query(Group).filter(Group.id == group_id).first()
     if not group:
         raise HTTPException(404, "Grupo no encontrado.")
@@ -772,12 +1084,8 @@ def leave_group(group_id: int, session=Depends(get_current_session), db: Session
 @app.get("/api/groups/{group_id}/invitations")
 def list_group_invitations(group_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """List pending invitations for a group. Only the owner can see."""
-    user_id = session["user_id"]
-    group = db.query(Group).filter(Group.id == group_id).first()
-    if not group:
-        raise HTTPException(404, "Grupo no encontrado.")
-    if group.owner_id != user_id:
-        raise HTTPException(403, "Solo el creador puede ver las invitaciones.")
+    user_id = session.user_id
+    _get_owned_group(db, group_id, user_id, "Solo el creador puede ver las invitaciones.")
 
     invitations = (
         db.query(GroupInvitation)
@@ -803,12 +1111,8 @@ def list_group_invitations(group_id: int, session=Depends(get_current_session),
 @app.delete("/api/groups/{group_id}/invitations/{invitation_id}")
 def cancel_invitation(group_id: int, invitation_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Cancel a pending invitation. Only the owner can cancel."""
-    user_id = session["user_id"]
-    group = db.query(Group).filter(Group.id == group_id).first()
-    if not group:
-        raise HTTPException(404, "Grupo no encontrado.")
-    if group.owner_id != user_id:
-        raise HTTPException(403, "Solo el creador puede cancelar invitaciones.")
+    user_id = session.user_id
+    _get_owned_group(db, group_id, user_id, "Solo el creador puede cancelar invitaciones.")
 
     invitation = db.query(GroupInvitation).filter(
         GroupInvitation.id == invitation_id,
@@ -826,22 +1130,36 @@ def cancel_invitation(group_id: int, invitation_id: int, session=Depends(get_cur
 # --- Group Vault (passwords) ---
 
 @app.get("/api/groups/{group_id}/vault", response_model=list[GroupPasswordOut])
-def list_group_vault(group_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
+def list_group_vault(
+    group_id: int,
+    response: Response,
+    limit: int = 0,
+    cursor: int = 0,
+    session=Depends(get_current_session),
+    db: Session = Depends(get_db),
+):
     """List all passwords in a group vault."""
-    user_id = session["user_id"]
-    is_member = db.query(GroupMember).filter(GroupMember.group_id == group_id, GroupMember.user_id == user_id).first()
-    if not is_member:
+    user_id = session.user_id
+    if not _is_member(db, group_id, user_id):
         raise HTTPException(403, "No eres miembro de este grupo.")
 
-    entries = (
+    query = (
         db.query(GroupPassword)
         .options(joinedload(GroupPassword.added_by_user))
         .filter(GroupPassword.group_id == group_id)
-        .order_by(GroupPassword.updated_at.desc())
-        .all()
     )
+    if limit > 0:
+        # Same opt-in keyset pagination as list_vault.
+        if cursor > 0:
+            query = query.filter(GroupPassword.id < cursor)
+        entries = query.order_by(GroupPassword.id.desc()).limit(limit + 1).all()
+        if len(entries) > limit:
+            entries = entries[:limit]
+            response.headers["X-Next-Cursor"] = str(entries[-1].id)
+    else:
+        entries = query.order_by(GroupPassword.updated_at.desc()).all()
     return [
-        GroupPasswordOut(
+        GroupPasswordOut.model_construct(
             id=e.id,
             group_id=e.group_id,
             title=e.title,
@@ -865,9 +1183,8 @@ def create_group_vault_entry(
     db: Session = Depends(get_db),
 ):
     """Add a password to a group vault."""
-    user_id = session["user_id"]
-    is_member = db.query(GroupMember).filter(GroupMember.group_id == group_id, GroupMember.user_id == user_id).first()
-    if not is_member:
+    user_id = session.user_id
+    if not _is_member(db, group_id, user_id):
         raise HTTPException(403, "No eres miembro de este grupo.")
 
     # Client sends already-encrypted data (encrypted with group key client-side)
@@ -883,9 +1200,8 @@ def create_group_vault_entry(
     )
     db.add(entry)
     db.commit()
-    db.refresh(entry)
 
-    return GroupPasswordOut(
+    return GroupPasswordOut.model_construct(
         id=entry.id,
         group_id=entry.group_id,
         title=entry.title,
@@ -907,16 +1223,25 @@ def get_group_vault_entry(
     db: Session = Depends(get_db),
 ):
     """Get a group vault entry with encrypted password (client decrypts)."""
-    user_id = session["user_id"]
-    is_member = db.query(GroupMember).filter(GroupMember.group_id == group_id, GroupMember.user_id == user_id).first()
-    if not is_member:
-        raise HTTPException(403, "No eres miembro de este grupo.")
-
-    entry = db.query(GroupPassword).filter(GroupPassword.id == entry_id, GroupPassword.group_id == group_id).first()
+    user_id = session.user_id
+    # Fold the membership check into the entry fetch: the join against
+    # group_members only matches when the caller belongs to the group, so the
+    # common path is a single query. On a miss, one probe tells 403 from 404.
+    entry = db.execute(
+        select(GroupPassword)
+        .join(
+            GroupMember,
+            and_(GroupMember.group_id == GroupPassword.group_id, GroupMember.user_id == user_id),
+        )
+        .where(GroupPassword.id == entry_id, GroupPassword.group_id == group_id)
+        .options(joinedload(GroupPassword.added_by_user))
+    ).scalars().first()
     if not entry:
+        if not _is_member(db, group_id, user_id):
+            raise HTTPException(403, "No eres miembro de este grupo.")
         raise HTTPException(404, "Entrada no encontrada.")
 
-    return GroupPasswordEncrypted(
+    return GroupPasswordEncrypted.model_construct(
         id=entry.id,
         group_id=entry.group_id,
         title=entry.title,
@@ -941,12 +1266,8 @@ def update_group_vault_entry(
     db: Session = Depends(get_db),
 ):
     """Update a password in a group vault. Only the group owner can edit."""
-    user_id = session["user_id"]
-    group = db.query(Group).filter(Group.id == group_id).first()
-    if not group:
-        raise HTTPException(404, "Grupo no encontrado.")
-    if group.owner_id != user_id:
-        raise HTTPException(403, "Solo el creador del grupo puede editar contrase\u00f1as.")
+    user_id = session.user_id
+    _get_owned_group(db, group_id, user_id, "Solo el creador del grupo puede editar contrase\u00f1as.")
 
     entry = db.query(GroupPassword).filter(GroupPassword.id == entry_id, GroupPassword.group_id == group_id).first()
     if not entry:
@@ -965,9 +1286,8 @@ def update_group_vault_entry(
         entry.iv = data.iv
 
     db.commit()
-    db.refresh(entry)
 
-    return GroupPasswordOut(
+    return GroupPasswordOut.model_construct(
         id=entry.id,
         group_id=entry.group_id,
         title=entry.title,
@@ -989,15 +1309,16 @@ def delete_group_vault_entry(
     db: Session = Depends(get_db),
 ):
     """Delete a password from a group vault. Only the group owner can delete."""
-    user_id = session["user_id"]
-    group = db.query(Group).filter(Group.id == group_id).first()
-    if not group:
-        raise HTTPException(404, "Grupo no encontrado.")
-    if group.owner_id != user_id:
-        raise HTTPException(403, "Solo el creador del grupo puede eliminar contraseñas.")
-
-    entry = db.query(GroupPassword).filter(GroupPassword.id == entry_id, GroupPassword.group_id == group_id).first()
+    user_id = session.user_id
+    # Same single-query shape as get_group_vault_entry, but joined on
+    # ownership since only the owner may delete.
+    entry = db.execute(
+        select(GroupPassword)
+        .join(Group, and_(Group.id == GroupPassword.group_id, Group.owner_id == user_id))
+        .where(GroupPassword.id == entry_id, GroupPassword.group_id == group_id)
+    ).scalars().first()
     if not entry:
+        _get_owned_group(db, group_id, user_id, "Solo el creador del grupo puede eliminar contraseñas.")
         raise HTTPException(404, "Entrada no encontrada.")
 
     db.delete(entry)
@@ -1010,14 +1331,14 @@ def delete_group_vault_entry(
 @app.get("/api/kids/accounts", response_model=list[KidsAccountOut])
 def list_kids_accounts(session=Depends(get_current_session), db: Session = Depends(get_db)):
     """List kids accounts created by the current user."""
-    user_id = session["user_id"]
-    # Only normal users can have kids accounts
-    user = db.query(User).filter(User.id == user_id).first()
-    if user and user.is_kids_account:
+    user_id = session.user_id
+    # Only normal users can have kids accounts; the flag already rides along
+    # in the session context, so no User SELECT is needed.
+    if session.is_kids_account:
         raise HTTPException(403, "Las cuentas kids no pueden crear subcuentas.")
     kids = db.query(User).filter(User.parent_id == user_id).all()
     return [
-        KidsAccountOut(id=k.id, username=k.username, created_at=k.created_at)
+        KidsAccountOut.model_construct(id=k.id, username=k.username, created_at=k.created_at)
         for k in kids
     ]
 
@@ -1025,9 +1346,8 @@ def list_kids_accounts(session=Depends(get_current_session), db: Session = Depen
 @app.post("/api/kids/accounts", response_model=KidsAccountOut)
 def create_kids_account(data: KidsAccountCreate, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Create a new kids account."""
-    user_id = session["user_id"]
-    user = db.query(User).filter(User.id == user_id).first()
-    if user and user.is_kids_account:
+    user_id = session.user_id
+    if session.is_kids_account:
         raise HTTPException(403, "Las cuentas kids no pueden crear subcuentas.")
 
     if len(data.username.strip()) < 3:
@@ -1035,31 +1355,32 @@ def create_kids_account(data: KidsAccountCreate, session=Depends(get_current_ses
     if len(data.password) < 4:
         raise HTTPException(400, "La contraseña debe tener al menos 4 caracteres.")
 
-    existing = db.query(User).filter(User.username == data.username.strip()).first()
-    if existing:
-        raise HTTPException(400, "El nombre de usuario ya está en uso.")
-
     salt = generate_salt()
     password_hash = hash_master_password(data.password, salt)
 
     kid = User(
         username=data.username.strip(),
         password_hash=password_hash,
-        salt=base64.b64encode(salt).decode("utf-8"),
+        salt=_b64encode(salt, newline=False).decode("ascii"),
         is_kids_account=True,
         parent_id=user_id,
     )
     db.add(kid)
-    db.commit()
-    db.refresh(kid)
+    # No duplicate pre-SELECT: the unique index on username is the real
+    # arbiter anyway (a pre-check is racy), so just attempt the insert.
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(400, "El nombre de usuario ya está en uso.")
 
-    return KidsAccountOut(id=kid.id, username=kid.username, created_at=kid.created_at)
+    return KidsAccountOut.model_construct(id=kid.id, username=kid.username, created_at=kid.created_at)
 
 
 @app.put("/api/kids/accounts/{kid_id}", response_model=KidsAccountOut)
 def update_kids_account(kid_id: int, data: KidsAccountUpdate, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Update a kid's username and/or password. Only the parent can edit."""
-    user_id = session["user_id"]
+    user_id = session.user_id
     kid = db.query(User).filter(User.id == kid_id, User.parent_id == user_id).first()
     if not kid:
         raise HTTPException(404, "Cuenta no encontrada.")
@@ -1078,19 +1399,19 @@ def update_kids_account(kid_id: int, data: KidsAccountUpdate, session=Depends(ge
             raise HTTPException(400, "La contraseña debe tener al menos 4 caracteres.")
         new_salt = generate_salt()
         kid.password_hash = hash_master_password(data.password, new_salt)
-        kid.salt = base64.b64encode(new_salt).decode("utf-8")
+        kid.salt = _b64encode(new_salt, newline=False).decode("ascii")
         # Clear any active sessions for this kid
         db.query(UserSession).filter(UserSession.user_id == kid.id).delete()
+        _evict_user_sessions(kid.id)
 
     db.commit()
-    db.refresh(kid)
-    return KidsAccountOut(id=kid.id, username=kid.username, created_at=kid.created_at)
+    return KidsAccountOut.model_construct(id=kid.id, username=kid.username, created_at=kid.created_at)
 
 
 @app.delete("/api/kids/accounts/{kid_id}")
 def delete_kids_account(kid_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Delete a kids account. Only the parent can delete."""
-    user_id = session["user_id"]
+    user_id = session.user_id
     kid = db.query(User).filter(User.id == kid_id, User.parent_id == user_id).first()
     if not kid:
         raise HTTPException(404, "Cuenta no encontrada.")
@@ -1100,8 +1421,15 @@ def delete_kids_account(kid_id: int, session=Depends(get_current_session), db: S
 
 
 # --- Helper to verify parent access to kid's vault ---
-def _get_kid_for_parent(kid_id: int, user_id: int, db: Session) -> User:
-    kid = db.query(User).filter(User.id == kid_id).first()
+def _get_kid_for_parent(kid_id: int, user_id: int, db: Session):
+    """Authorize access to a kids account, returning (id, parent_id, salt).
+
+    Column-only select: the handlers need exactly these three values, so
+    skip hydrating and identity-mapping a full User instance per request.
+    """
+    kid = db.execute(
+        select(User.id, User.parent_id, User.salt).where(User.id == kid_id)
+    ).first()
     if not kid:
         raise HTTPException(404, "Cuenta no encontrada.")
     # Allow access if: parent owns this kid, OR user IS this kid
@@ -1113,25 +1441,28 @@ def _get_kid_for_parent(kid_id: int, user_id: int, db: Session) -> User:
 @app.get("/api/kids/accounts/{kid_id}/vault")
 def list_kids_vault(kid_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """List vault entries for a kids account."""
-    user_id = session["user_id"]
+    user_id = session.user_id
     kid = _get_kid_for_parent(kid_id, user_id, db)
 
-    entries = db.query(Password).filter(Password.user_id == kid.id).order_by(Password.updated_at.desc()).all()
+    # Core select of just the listed columns: skips ORM instrumentation and,
+    # more importantly, never pulls the encrypted_password blob this listing
+    # doesn't return (clients fetch ciphertext per entry).
+    rows = db.execute(
+        select(
+            Password.id,
+            Password.title,
+            Password.username,
+            Password.url,
+            Password.notes,
+            Password.is_favorite,
+            Password.created_at,
+            Password.updated_at,
+        )
+        .where(Password.user_id == kid.id)
+        .order_by(Password.updated_at.desc())
+    )
     return {
-        "entries": [
-            {
-                "id": e.id,
-                "title": e.title,
-                "username": e.username,
-                "url": e.url,
-                "notes": e.notes,
-                "is_favorite": e.is_favorite,
-                "created_at": e.created_at,
-                "updated_at": e.updated_at,
-                "tags": [],
-            }
-            for e in entries
-        ],
+        "entries": [{**row._mapping, "tags": []} for row in rows],
         "kid_salt": kid.salt,
         "kid_id": kid.id,
         "parent_id": kid.parent_id,
@@ -1141,7 +1472,7 @@ def list_kids_vault(kid_id: int, session=Depends(get_current_session), db: Sessi
 @app.post("/api/kids/accounts/{kid_id}/vault")
 def create_kids_vault_entry(kid_id: int, data: VaultEntryCreate, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Create a vault entry for a kids account. Client sends pre-encrypted data."""
-    user_id = session["user_id"]
+    user_id = session.user_id
     kid = _get_kid_for_parent(kid_id, user_id, db)
 
     # Client sends already-encrypted data (encrypted with kid key client-side)
@@ -1157,7 +1488,6 @@ def create_kids_vault_entry(kid_id: int, data: VaultEntryCreate, session=Depends
     )
     db.add(entry)
     db.commit()
-    db.refresh(entry)
     return {
         "id": entry.id,
         "title": entry.title,
@@ -1174,7 +1504,7 @@ def create_kids_vault_entry(kid_id: int, data: VaultEntryCreate, session=Depends
 @app.get("/api/kids/accounts/{kid_id}/vault/{entry_id}")
 def get_kids_vault_entry(kid_id: int, entry_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Get a single vault entry (with encrypted password) for a kids account. Client decrypts."""
-    user_id = session["user_id"]
+    user_id = session.user_id
     kid = _get_kid_for_parent(kid_id, user_id, db)
 
     entry = db.query(Password).filter(Password.id == entry_id, Password.user_id == kid.id).first()
@@ -1202,7 +1532,7 @@ def get_kids_vault_entry(kid_id: int, entry_id: int, session=Depends(get_current
 @app.delete("/api/kids/accounts/{kid_id}/vault/{entry_id}")
 def delete_kids_vault_entry(kid_id: int, entry_id: int, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Delete a vault entry from a kids account."""
-    user_id = session["user_id"]
+    user_id = session.user_id
     kid = _get_kid_for_parent(kid_id, user_id, db)
 
     entry = db.query(Password).filter(Password.id == entry_id, Password.user_id == kid.id).first()
@@ -1216,41 +1546,70 @@ def delete_kids_vault_entry(kid_id: int, entry_id: int, session=Depends(get_curr
 
 # ==================== PROFILE ====================
 
+# Short-lived memo of successful password re-verifications, so a burst of
+# profile operations (each of which re-asks for the password) pays the
+# Argon2 cost once instead of per request. Keys hold a sha256 of the
+# password, never the password itself; entries live in-process only and
+# expire after 30 seconds.
+_PWVERIFY_TTL = 30.0
+_PWVERIFY_CACHE: dict[tuple[int, bytes], float] = {}
+
+
+async def _verify_current_password(user: User, password: str) -> bool:
+    """Verify a profile operation's current-password field, with a 30s memo."""
+    key = (user.id, hashlib.sha256(password.encode("utf-8")).digest())
+    now = asyncio.get_running_loop().time()
+    cached = _PWVERIFY_CACHE.get(key)
+    if cached is not None and now - cached < _PWVERIFY_TTL:
+        return True
+    salt = _b64decode(user.salt)
+    if not await asyncio.to_thread(verify_master_password, password, salt, user.password_hash):
+        return False
+    _PWVERIFY_CACHE[key] = now
+    return True
+
+
+def _clear_password_verifications(user_id: int) -> None:
+    """Drop memoized verifications for a user (after a password change)."""
+    for key in [k for k in _PWVERIFY_CACHE if k[0] == user_id]:
+        _PWVERIFY_CACHE.pop(key, None)
+
+
 @app.put("/api/profile/username")
-def change_username(data: ChangeUsername, session=Depends(get_current_session), db: Session = Depends(get_db)):
+async def change_username(data: ChangeUsername, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Change the current user's username. Requires current password."""
-    user = db.query(User).filter(User.id == session["user_id"]).first()
+    user = db.query(User).filter(User.id == session.user_id).first()
     if not user:
         raise HTTPException(404, "Usuario no encontrado.")
 
-    salt = base64.b64decode(user.salt)
-    if not verify_master_password(data.current_password, salt, user.password_hash):
+    if not await _verify_current_password(user, data.current_password):
         raise HTTPException(403, "Contraseña incorrecta.")
 
     new_username = data.new_username.strip()
     if len(new_username) < 3:
         raise HTTPException(400, "El nombre de usuario debe tener al menos 3 caracteres.")
 
-    existing = db.query(User).filter(User.username == new_username, User.id != user.id).first()
-    if existing:
-        raise HTTPException(400, "El nombre de usuario ya está en uso.")
-
     user.username = new_username
     # Update all sessions for this user
     db.query(UserSession).filter(UserSession.user_id == user.id).update({"username": new_username})
-    db.commit()
+    # Unique-index race instead of a pre-SELECT (same as create_kids_account).
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(400, "El nombre de usuario ya está en uso.")
+    _evict_user_sessions(user.id)
     return {"message": "Nombre de usuario actualizado.", "username": new_username}
 
 
 @app.put("/api/profile/password")
-def change_password(data: ChangePassword, session=Depends(get_current_session), db: Session = Depends(get_db)):
+async def change_password(data: ChangePassword, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Change the current user's master password. Client sends re-encrypted vault entries."""
-    user = db.query(User).filter(User.id == session["user_id"]).first()
+    user = db.query(User).filter(User.id == session.user_id).first()
     if not user:
         raise HTTPException(404, "Usuario no encontrado.")
 
-    old_salt = base64.b64decode(user.salt)
-    if not verify_master_password(data.current_password, old_salt, user.password_hash):
+    if not await _verify_current_password(user, data.current_password):
         raise HTTPException(403, "Contraseña actual incorrecta.")
 
     if len(data.new_password) < 8:
@@ -1258,30 +1617,42 @@ def change_password(data: ChangePassword, session=Depends(get_current_session),
 
     # Generate new salt & hash (no key derivation on server)
     new_salt = generate_salt()
-    new_password_hash = hash_master_password(data.new_password, new_salt)
-    new_salt_b64 = base64.b64encode(new_salt).decode("utf-8")
+    new_password_hash = await asyncio.to_thread(hash_master_password, data.new_password, new_salt)
+    new_salt_b64 = _b64encode(new_salt, newline=False).decode("ascii")
 
-    # Apply re-encrypted entries from client
+    # Apply re-encrypted entries from client. The crypto already happened
+    # client-side; the server just swaps ciphertexts, so this is one
+    # ownership query plus a bulk executemany UPDATE instead of a
+    # SELECT + dirty-tracked write per entry.
     if data.re_encrypted_entries:
-        for re_entry in data.re_encrypted_entries:
-            entry = db.query(Password).filter(
-                Password.id == re_entry["id"],
-                Password.user_id == user.id,
-            ).first()
-            if entry:
-                entry.encrypted_password = re_entry["encrypted_password"]
-                entry.iv = re_entry["iv"]
+        owned_ids = {
+            row[0]
+            for row in db.execute(select(Password.id).where(Password.user_id == user.id))
+        }
+        updates = [
+            {
+                "id": re_entry["id"],
+                "encrypted_password": re_entry["encrypted_password"],
+                "iv": re_entry["iv"],
+            }
+            for re_entry in data.re_encrypted_entries
+            if re_entry["id"] in owned_ids
+        ]
+        if updates:
+            db.execute(update(Password), updates)
 
     user.password_hash = new_password_hash
     user.salt = new_salt_b64
 
     # Clear all sessions (user will re-login)
     db.query(UserSession).filter(UserSession.user_id == user.id).delete()
+    _evict_user_sessions(user.id)
+    _clear_password_verifications(user.id)
 
     # Create new session
     token = secrets.token_urlsafe(32)
     sess = UserSession(
-        token=token,
+        token=_hash_token(token),
         user_id=user.id,
         username=user.username,
     )
@@ -1292,26 +1663,27 @@ def change_password(data: ChangePassword, session=Depends(get_current_session),
 
 
 @app.delete("/api/profile")
-def delete_account(data: DeleteAccount, session=Depends(get_current_session), db: Session = Depends(get_db)):
+async def delete_account(data: DeleteAccount, session=Depends(get_current_session), db: Session = Depends(get_db)):
     """Delete the current user's account permanently. Requires current password."""
-    user = db.query(User).filter(User.id == session["user_id"]).first()
+    user = db.query(User).filter(User.id == session.user_id).first()
     if not user:
         raise HTTPException(404, "Usuario no encontrado.")
 
-    salt = base64.b64decode(user.salt)
-    if not verify_master_password(data.current_password, salt, user.password_hash):
+    if not await _verify_current_password(user, data.current_password):
         raise HTTPException(403, "Contraseña incorrecta.")
 
-    # Delete all related data
-    db.query(Password).filter(Password.user_id == user.id).delete()
-    db.query(UserSession).filter(UserSession.user_id == user.id).delete()
-    # Delete kids accounts and their data in bulk
-    kids = db.query(User).filter(User.parent_id == user.id).all()
-    if kids:
-        kid_ids = [k.id for k in kids]
-        db.query(Password).filter(Password.user_id.in_(kid_ids)).delete(synchronize_session=False)
-        db.query(UserSession).filter(UserSession.user_id.in_(kid_ids)).delete(synchronize_session=False)
-        db.query(User).filter(User.id.in_(kid_ids)).delete(synchronize_session=False)
+    # One DELETE per table covering the user and all their kids at once,
+    # instead of separate statements per account.
+    account_ids = select(User.id).where(or_(User.id == user.id, User.parent_id == user.id))
+    db.execute(delete(Password).where(Password.user_id.in_(account_ids)))
+    db.execute(delete(UserSession).where(UserSession.user_id.in_(account_ids)))
+    kid_ids = db.execute(select(User.id).where(User.parent_id == user.id)).scalars().all()
+    for account_id in (user.id, *kid_ids):
+        _evict_user_sessions(account_id)
+    if kid_ids:
+        db.execute(delete(User).where(User.id.in_(kid_ids)))
+    # ORM delete for the user itself: SQLite doesn't enforce the FK cascades,
+    # so the relationship cascade is what cleans up groups/tags/invitations.
     db.delete(user)
     db.commit()
     return {"message": "Cuenta eliminada."}
@@ -1339,7 +1711,7 @@ def create_share_link(
     share_id = secrets.token_urlsafe(16)
     link = SharedLink(
         id=share_id,
-        creator_id=session["user_id"],
+        creator_id=session.user_id,
         encrypted_data=data.encrypted_data,
         iv=data.iv,
         access_mode=data.access_mode,
@@ -1371,7 +1743,7 @@ def get_share_link(
     # Check access
     if link.access_mode == "specific":
         allowed = [u.strip().lower() for u in link.allowed_usernames.split(",") if u.strip()]
-        current_username = session["username"].lower()
+        current_username = session.username.lower()
         if current_username not in allowed:
             raise HTTPException(403, "No tienes acceso a este enlace.")
 
@@ -1388,4 +1760,18 @@ def get_share_link(
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+
+    if os.getenv("DEV"):
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        # Sessions live in the database, so workers share auth state.
+        # PBKDF2-heavy logins scale across cores this way instead of
+        # queueing behind a single worker.
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+            loop="uvloop",
+            http="httptools",
+        )
@@ -0,0 +1,27 @@
+"""
+Migration: Add query indexes to existing databases.
+create_all only creates indexes alongside new tables, so databases that
+predate the composite indexes in models.py need this run once.
+"""
+import os, sys
+sys.path.insert(0, os.path.dirname(__file__))
+
+from database import engine
+from sqlalchemy import text
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_passwords_user_updated ON passwords (user_id, updated_at)",
+    "CREATE INDEX IF NOT EXISTS ix_passwords_user_favorite ON passwords (user_id) WHERE is_favorite = 1",
+    "CREATE INDEX IF NOT EXISTS ix_group_passwords_group_updated ON group_passwords (group_id, updated_at)",
+    "CREATE INDEX IF NOT EXISTS ix_group_invitations_invitee_status ON group_invitations (invitee_id, status)",
+]
+
+def migrate():
+    with engine.connect() as conn:
+        for stmt in INDEXES:
+            conn.execute(text(stmt))
+        conn.commit()
+        print("✅ indexes created successfully")
+
+if __name__ == "__main__":
+    migrate()
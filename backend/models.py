@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Table, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index, Table, UniqueConstraint, text
 from sqlalchemy.orm import relationship, backref
 from datetime import datetime, timezone
 from database import Base
@@ -39,6 +39,9 @@ class Password(Base):
     title = Column(String, nullable=False)
     username = Column(String, default="")
     url = Column(String, default="")
+    # Ciphertext/IV are stored exactly as the client sends them (base64 over
+    # JSON, zero-knowledge). BLOB storage would just add a decode on write
+    # and an encode on every read since base64 is the wire format anyway.
     encrypted_password = Column(Text, nullable=False)
     iv = Column(String, nullable=False)
     notes = Column(Text, default="")
@@ -46,6 +49,14 @@ class Password(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (
+        # list_vault filters by user and orders by updated_at DESC; this lets
+        # SQLite walk the index instead of scanning + sorting.
+        Index("ix_passwords_user_updated", "user_id", "updated_at"),
+        # Partial index for favorites_only — only favorite rows enter the tree.
+        Index("ix_passwords_user_favorite", "user_id", sqlite_where=text("is_favorite = 1")),
+    )
+
     user = relationship("User", back_populates="passwords")
     tags = relationship("Tag", secondary=password_tags, back_populates="passwords")
 
@@ -126,6 +137,11 @@ class GroupPassword(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (
+        # list_group_vault filters by group and orders by updated_at DESC.
+        Index("ix_group_passwords_group_updated", "group_id", "updated_at"),
+    )
+
     group = relationship("Group", back_populates="passwords")
     added_by_user = relationship("User")
 
@@ -142,6 +158,8 @@ class GroupInvitation(Base):
 
     __table_args__ = (
         UniqueConstraint("group_id", "invitee_id", name="uq_group_invitation"),
+        # get_pending_invitations filters on invitee + status.
+        Index("ix_group_invitations_invitee_status", "invitee_id", "status"),
     )
 
     group = relationship("Group", back_populates="invitations")
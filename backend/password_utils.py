@@ -1,12 +1,57 @@
 """
 Password generation and checking utilities for Sekure.
 """
+import asyncio
+import bisect
+import os
 import secrets
 import string
 import math
 import hashlib
 import httpx
 import re
+from collections import Counter
+from functools import lru_cache
+
+from cachetools import TTLCache
+
+# Shared CSPRNG instance: SystemRandom draws from the same os.urandom pool
+# as secrets but exposes the C-implemented shuffle/choice batch helpers.
+_SR = secrets.SystemRandom()
+
+# Generator charsets, bound once at import.
+_LOWERCASE = string.ascii_lowercase
+_UPPERCASE = string.ascii_uppercase
+_DIGIT_CHARS = string.digits
+_SYMBOLS = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+# Set form for membership tests (shared with the register-password check).
+SYMBOLS_SET = frozenset(_SYMBOLS)
+_ALNUM = string.ascii_letters + string.digits
+# The UI calls the generator with every class enabled; pre-join that charset
+# once so the common case skips the per-call conditional assembly.
+_DEFAULT_REQUIRED = (_LOWERCASE, _UPPERCASE, _DIGIT_CHARS, _SYMBOLS)
+_DEFAULT_CHARSET = "".join(_DEFAULT_REQUIRED)
+
+
+def _bulk_choice(charset: str, n: int) -> list[str]:
+    """Draw n uniform characters from charset with one bulk entropy request.
+
+    Rejection sampling over secrets.token_bytes keeps the distribution
+    uniform (bytes >= the largest multiple of len(charset) are discarded)
+    while amortizing what secrets.choice would do as one urandom round-trip
+    per character.
+    """
+    size = len(charset)
+    limit = 256 - (256 % size)
+    picked: list[str] = []
+    while len(picked) < n:
+        for byte in secrets.token_bytes(n - len(picked) + 8):
+            if byte < limit:
+                picked.append(charset[byte % size])
+                if len(picked) == n:
+                    break
+    return picked
+
 
 def generate_random_password(
     length: int = 20,
@@ -16,26 +61,31 @@ def generate_random_password(
     include_symbols: bool = True,
 ) -> str:
     """Generate a cryptographically secure random password."""
-    charset = ""
-    required = []
-
-    if include_lowercase:
-        charset += string.ascii_lowercase
-        required.append(secrets.choice(string.ascii_lowercase))
-    if include_uppercase:
-        charset += string.ascii_uppercase
-        required.append(secrets.choice(string.ascii_uppercase))
-    if include_digits:
-        charset += string.digits
-        required.append(secrets.choice(string.digits))
-    if include_symbols:
-        symbols = "!@#$%^&*()_+-=[]{}|;:,.<>?"
-        charset += symbols
-        required.append(secrets.choice(symbols))
-
-    if not charset:
-        charset = string.ascii_letters + string.digits
-        required = [secrets.choice(charset)]
+    if include_lowercase and include_uppercase and include_digits and include_symbols:
+        # Common case: all classes on, charset pre-joined at import.
+        charset = _DEFAULT_CHARSET
+        required = [secrets.choice(cs) for cs in _DEFAULT_REQUIRED]
+    else:
+        parts = []
+        required = []
+
+        if include_lowercase:
+            parts.append(_LOWERCASE)
+            required.append(secrets.choice(_LOWERCASE))
+        if include_uppercase:
+            parts.append(_UPPERCASE)
+            required.append(secrets.choice(_UPPERCASE))
+        if include_digits:
+            parts.append(_DIGIT_CHARS)
+            required.append(secrets.choice(_DIGIT_CHARS))
+        if include_symbols:
+            parts.append(_SYMBOLS)
+            required.append(secrets.choice(_SYMBOLS))
+
+        charset = "".join(parts)
+        if not charset:
+            charset = _ALNUM
+            required = [secrets.choice(charset)]
 
     # Fill remaining length
     remaining = length - len(required)
@@ -43,12 +93,10 @@ def generate_random_password(
         remaining = 0
         required = required[:length]
 
-    password_chars = required + [secrets.choice(charset) for _ in range(remaining)]
+    password_chars = required + _bulk_choice(charset, remaining)
 
-    # Shuffle using Fisher-Yates with secrets
-    for i in range(len(password_chars) - 1, 0, -1):
-        j = secrets.randbelow(i + 1)
-        password_chars[i], password_chars[j] = password_chars[j], password_chars[i]
+    # Fisher-Yates shuffle, done by SystemRandom in C (still os.urandom-fed)
+    _SR.shuffle(password_chars)
 
     return "".join(password_chars)
 
@@ -59,20 +107,20 @@ def _augment_word(word: str) -> str:
     Examples: ca3paz, !capaz, capaz7#, c@4apaz"""
     symbols = "!@#$%&*?+="
     # Generate a random extra: number, symbol, or both
-    choice = secrets.randbelow(3)
+    choice = _SR.randrange(3)
     if choice == 0:
-        extra = str(secrets.randbelow(100))
+        extra = str(_SR.randrange(100))
     elif choice == 1:
-        extra = secrets.choice(symbols)
+        extra = _SR.choice(symbols)
     else:
-        extra = str(secrets.randbelow(100)) + secrets.choice(symbols)
+        extra = str(_SR.randrange(100)) + _SR.choice(symbols)
 
     # Placement: 0=before, 1=inside, 2=after
-    placement = secrets.randbelow(3)
+    placement = _SR.randrange(3)
     if placement == 0:
         return extra + word
     elif placement == 1 and len(word) > 1:
-        pos = secrets.randbelow(len(word) - 1) + 1
+        pos = _SR.randrange(1, len(word))
         return word[:pos] + extra + word[pos:]
     else:
         return word + extra
@@ -89,9 +137,7 @@ def generate_passphrase(num_words: int = 5, separator: str = "-", custom_words:
 
     # Capitalize and shuffle word order
     words = [w.capitalize() for w in cw]
-    for i in range(len(words) - 1, 0, -1):
-        j = secrets.randbelow(i + 1)
-        words[i], words[j] = words[j], words[i]
+    _SR.shuffle(words)
 
     # Optionally augment each word with random numbers/symbols
     if augment_words:
@@ -102,7 +148,8 @@ def generate_passphrase(num_words: int = 5, separator: str = "-", custom_words:
 
 def generate_pin(length: int = 6) -> str:
     """Generate a secure PIN."""
-    return "".join([str(secrets.randbelow(10)) for _ in range(length)])
+    # One bulk entropy draw instead of a randbelow call per digit.
+    return "".join(_bulk_choice(_DIGIT_CHARS, length))
 
 
 def generate_password(
@@ -130,118 +177,155 @@ def generate_password(
 
 # --- Password Strength Analysis ---
 
-def calculate_entropy(password: str) -> float:
-    """Calculate the Shannon entropy of a password."""
-    if not password:
-        return 0.0
+# Character classes for the analysis functions. Classifying through a
+# 256-entry translation table turns the repeated "c in string.X" scans into
+# one C-level bytes.translate() pass per password; everything downstream
+# (charset size, per-char types, distribution) derives from that array.
+_CLASS_LOWER, _CLASS_UPPER, _CLASS_DIGIT, _CLASS_SYMBOL, _CLASS_OTHER = range(5)
+_CLASS_BITS = {_CLASS_LOWER: 26, _CLASS_UPPER: 26, _CLASS_DIGIT: 10, _CLASS_SYMBOL: 32}
+_TYPE_NAMES = ("lowercase", "uppercase", "digit", "symbol", "other")
+
+
+def _classify_codepoint(code: int) -> int:
+    char = chr(code)
+    if char in string.ascii_lowercase:
+        return _CLASS_LOWER
+    if char in string.ascii_uppercase:
+        return _CLASS_UPPER
+    if char in string.digits:
+        return _CLASS_DIGIT
+    if char in string.punctuation:
+        return _CLASS_SYMBOL
+    return _CLASS_OTHER
+
+
+_CLASS_TABLE = bytes(_classify_codepoint(code) for code in range(256))
+
+
+def char_classes(password: str) -> bytes:
+    """Map a password to one class byte per character, in a single pass.
+
+    The analysis functions all accept this array as an optional argument,
+    so a caller running several of them (like the /check endpoint) can
+    classify once and share the result.
+    """
+    try:
+        return password.encode("ascii").translate(_CLASS_TABLE)
+    except UnicodeEncodeError:
+        return bytes(
+            _CLASS_TABLE[code] if (code := ord(char)) < 128 else _CLASS_OTHER
+            for char in password
+        )
+
 
-    charset_size = 0
-    if any(c in string.ascii_lowercase for c in password):
-        charset_size += 26
-    if any(c in string.ascii_uppercase for c in password):
-        charset_size += 26
-    if any(c in string.digits for c in password):
-        charset_size += 10
-    if any(c in string.punctuation for c in password):
-        charset_size += 32
+# Charset size only ever takes one of 16 values (which of the four classes
+# are present), so both it and its log2 are precomputed per 4-bit mask —
+# no floating-point log on the hot path. Mask 0 is the Unicode fallback.
+_CHARSET_BY_MASK = [
+    sum(bits for cls, bits in _CLASS_BITS.items() if mask & (1 << cls)) or 128
+    for mask in range(16)
+]
+_BITS_BY_MASK = [math.log2(size) for size in _CHARSET_BY_MASK]
 
-    if charset_size == 0:
-        charset_size = 128  # Unicode fallback
 
-    entropy = len(password) * math.log2(charset_size)
+def _class_mask(classes: bytes) -> int:
+    mask = 0
+    for cls in _CLASS_BITS:
+        if cls in classes:
+            mask |= 1 << cls
+    return mask
+
+
+def calculate_entropy(password: str, classes: bytes | None = None) -> float:
+    """Calculate the Shannon entropy of a password."""
+    if not password:
+        return 0.0
+    if classes is None:
+        classes = char_classes(password)
+    entropy = len(password) * _BITS_BY_MASK[_class_mask(classes)]
     return round(entropy, 2)
 
 
-def calculate_entropy_breakdown(password: str) -> list[dict]:
+def calculate_entropy_breakdown(password: str, classes: bytes | None = None) -> list[dict]:
     """Calculate per-character entropy contribution for visualization."""
     if not password:
         return []
 
-    charset_size = 0
-    if any(c in string.ascii_lowercase for c in password):
-        charset_size += 26
-    if any(c in string.ascii_uppercase for c in password):
-        charset_size += 26
-    if any(c in string.digits for c in password):
-        charset_size += 10
-    if any(c in string.punctuation for c in password):
-        charset_size += 32
-    if charset_size == 0:
-        charset_size = 128
-
-    bits_per_char = math.log2(charset_size)
-    breakdown = []
-    cumulative = 0.0
-    for i, char in enumerate(password):
-        # Determine char type
-        if char in string.ascii_lowercase:
-            char_type = "lowercase"
-        elif char in string.ascii_uppercase:
-            char_type = "uppercase"
-        elif char in string.digits:
-            char_type = "digit"
-        elif char in string.punctuation:
-            char_type = "symbol"
-        else:
-            char_type = "other"
-
-        cumulative += bits_per_char
-        breakdown.append({
-            "position": i + 1,
+    if classes is None:
+        classes = char_classes(password)
+    bits_per_char = _BITS_BY_MASK[_class_mask(classes)]
+    bits_rounded = round(bits_per_char, 2)
+
+    # Per-character dicts are the shape the frontend chart consumes, so the
+    # structure stays; the loop itself is a single comprehension with the
+    # constant per-char bits rounded once and the running total computed
+    # multiplicatively instead of re-rounding an accumulator.
+    return [
+        {
+            "position": position,
             "char": char,
-            "type": char_type,
-            "bits": round(bits_per_char, 2),
-            "cumulative": round(cumulative, 2),
-        })
-
-    return breakdown
+            "type": _TYPE_NAMES[cls],
+            "bits": bits_rounded,
+            "cumulative": round(bits_per_char * position, 2),
+        }
+        for position, (char, cls) in enumerate(zip(password, classes), start=1)
+    ]
 
 
-def get_char_distribution(password: str) -> dict[str, int]:
+def get_char_distribution(password: str, classes: bytes | None = None) -> dict[str, int]:
     """Get character type distribution."""
-    dist = {"lowercase": 0, "uppercase": 0, "digits": 0, "symbols": 0, "other": 0}
-    for c in password:
-        if c in string.ascii_lowercase:
-            dist["lowercase"] += 1
-        elif c in string.ascii_uppercase:
-            dist["uppercase"] += 1
-        elif c in string.digits:
-            dist["digits"] += 1
-        elif c in string.punctuation:
-            dist["symbols"] += 1
-        else:
-            dist["other"] += 1
-    return dist
-
-
+    counts = Counter(classes if classes is not None else char_classes(password))
+    return {
+        "lowercase": counts[_CLASS_LOWER],
+        "uppercase": counts[_CLASS_UPPER],
+        "digits": counts[_CLASS_DIGIT],
+        "symbols": counts[_CLASS_SYMBOL],
+        "other": counts[_CLASS_OTHER],
+    }
+
+
+# Crack-time buckets as a sorted threshold table: one bisect replaces the
+# old if/elif cascade. Each row is (upper bound in seconds, label template,
+# divisor for the formatted value).
+_SECONDS_PER_YEAR = 86400 * 365
+_CRACK_BUCKETS = (
+    (1, "Instantáneo", 1),
+    (60, "{:.0f} segundos", 1),
+    (3600, "{:.0f} minutos", 60),
+    (86400, "{:.0f} horas", 3600),
+    (_SECONDS_PER_YEAR, "{:.0f} días", 86400),
+    (_SECONDS_PER_YEAR * 1000, "{:.0f} años", _SECONDS_PER_YEAR),
+    (_SECONDS_PER_YEAR * 1_000_000, "{:.0f} miles de años", _SECONDS_PER_YEAR * 1000),
+    (_SECONDS_PER_YEAR * 1_000_000_000, "{:.0f} millones de años", _SECONDS_PER_YEAR * 1_000_000),
+)
+# Bucket edges in log2 space: comparing entropy against these directly
+# avoids ever materializing 2**entropy, which overflows a float past
+# ~1024 bits (long passphrases hit that).
+_LOG2_GUESS_RATE = math.log2(10_000_000_000)  # 10 billion guesses/sec
+_CRACK_LOG_BOUNDS = tuple(math.log2(row[0]) for row in _CRACK_BUCKETS)
+
+
+# Both label functions are keyed by the rounded entropy value, which
+# collapses heavily under prefix-typing (same length/classes => same
+# entropy). Caching by entropy rather than by password means no user
+# secrets are ever retained in the cache.
+@lru_cache(maxsize=512)
 def estimate_crack_time(entropy: float) -> str:
     """Estimate time to crack based on entropy (assuming 10B guesses/sec)."""
     if entropy <= 0:
         return "Instantáneo"
 
-    guesses = 2 ** entropy
-    seconds = guesses / 10_000_000_000  # 10 billion guesses/sec
-
-    if seconds < 1:
-        return "Instantáneo"
-    elif seconds < 60:
-        return f"{seconds:.0f} segundos"
-    elif seconds < 3600:
-        return f"{seconds / 60:.0f} minutos"
-    elif seconds < 86400:
-        return f"{seconds / 3600:.0f} horas"
-    elif seconds < 86400 * 365:
-        return f"{seconds / 86400:.0f} días"
-    elif seconds < 86400 * 365 * 1000:
-        return f"{seconds / (86400 * 365):.0f} años"
-    elif seconds < 86400 * 365 * 1_000_000:
-        return f"{seconds / (86400 * 365 * 1000):.0f} miles de años"
-    elif seconds < 86400 * 365 * 1_000_000_000:
-        return f"{seconds / (86400 * 365 * 1_000_000):.0f} millones de años"
-    else:
+    log_seconds = entropy - _LOG2_GUESS_RATE
+    index = bisect.bisect_right(_CRACK_LOG_BOUNDS, log_seconds)
+    if index == len(_CRACK_BUCKETS):
         return "Más que la edad del universo"
+    # Safe to exponentiate now: in-table values are below ~2**55 seconds.
+    seconds = math.exp2(log_seconds)
+    _, template, divisor = _CRACK_BUCKETS[index]
+    return template.format(seconds / divisor)
 
 
+@lru_cache(maxsize=512)
 def get_strength_label(entropy: float) -> tuple[str, int]:
     """Get strength label and score from entropy."""
     if entropy < 28:
@@ -256,6 +340,27 @@ def get_strength_label(entropy: float) -> tuple[str, int]:
         return "Muy fuerte", 4
 
 
+# Frozensets give O(1) membership per character; the "in string.X" form
+# scanned the class string linearly for every character tested.
+_LOWER = frozenset(string.ascii_lowercase)
+_UPPER = frozenset(string.ascii_uppercase)
+_DIGITS = frozenset(string.digits)
+_PUNCT = frozenset(string.punctuation)
+
+# One alternation compiled at import scans the password once for all the
+# common patterns, instead of ten separate substring searches per call.
+_COMMON_PATTERNS = (
+    "12345", "qwerty", "password", "abcdef", "111111",
+    "admin", "letmein", "welcome", "monkey", "dragon",
+)
+_COMMON_RE = re.compile("|".join(map(re.escape, _COMMON_PATTERNS)))
+_REPEAT_RE = re.compile(r"(.)\1{2,}")
+
+# The common patterns are all ASCII, so an A-Z-only translate is enough to
+# normalize for the search and skips str.lower()'s full Unicode case tables.
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
 def analyze_password(password: str) -> list[str]:
     """Provide feedback on password weaknesses."""
     feedback = []
@@ -265,38 +370,38 @@ def analyze_password(password: str) -> list[str]:
     elif len(password) < 12:
         feedback.append("Considera usar al menos 12 caracteres para mayor seguridad.")
 
-    if not any(c in string.ascii_uppercase for c in password):
+    # Deduplicate once, then each class test touches distinct chars only.
+    chars = set(password)
+
+    if chars.isdisjoint(_UPPER):
         feedback.append("Añade letras mayúsculas para mejorar la seguridad.")
 
-    if not any(c in string.ascii_lowercase for c in password):
+    if chars.isdisjoint(_LOWER):
         feedback.append("Añade letras minúsculas para mejorar la seguridad.")
 
-    if not any(c in string.digits for c in password):
+    if chars.isdisjoint(_DIGITS):
         feedback.append("Añade números para incrementar la entropía.")
 
-    if not any(c in string.punctuation for c in password):
+    if chars.isdisjoint(_PUNCT):
         feedback.append("Añade símbolos especiales (!@#$%...) para mayor robustez.")
 
     # Check for common patterns
-    common_patterns = [
-        r"12345", r"qwerty", r"password", r"abcdef", r"111111",
-        r"admin", r"letmein", r"welcome", r"monkey", r"dragon",
-    ]
-    lower_pw = password.lower()
-    for pattern in common_patterns:
-        if pattern in lower_pw:
-            feedback.append(f"Evita patrones comunes como '{pattern}'.")
-            break
+    match = _COMMON_RE.search(password.translate(_ASCII_LOWER))
+    if match:
+        feedback.append(f"Evita patrones comunes como '{match.group(0)}'.")
 
     # Check for repeated characters
-    if re.search(r"(.)\1{2,}", password):
+    if _REPEAT_RE.search(password):
         feedback.append("Evita repetir el mismo carácter más de 2 veces seguidas.")
 
-    # Check for sequential characters
-    for i in range(len(password) - 2):
-        if (ord(password[i]) + 1 == ord(password[i + 1]) == ord(password[i + 2]) - 1):
+    # Check for sequential characters: two consecutive +1 steps show up as
+    # b"\x01\x01" in the codepoint-difference string, found with one C-level
+    # substring search instead of a Python loop of ord() comparisons.
+    if len(password) > 2:
+        codes = [ord(c) for c in password]
+        diffs = bytes(1 if b - a == 1 else 0 for a, b in zip(codes, codes[1:]))
+        if b"\x01\x01" in diffs:
             feedback.append("Evita secuencias de caracteres consecutivos (abc, 123).")
-            break
 
     if not feedback:
         feedback.append("¡Excelente! Tu contraseña parece robusta.")
@@ -304,29 +409,132 @@ def analyze_password(password: str) -> list[str]:
     return feedback
 
 
+# Perennial top entries of every breach corpus. Checking this set first
+# answers the most common case without a network round trip; anything not
+# in it still goes through the full HIBP range query.
+_COMMON_BREACHED = frozenset({
+    "123456", "123456789", "12345678", "12345", "1234567", "1234567890",
+    "password", "password1", "password123", "passw0rd", "contraseña",
+    "qwerty", "qwerty123", "qwertyuiop", "abc123", "111111", "123123",
+    "000000", "654321", "666666", "iloveyou", "admin", "admin123",
+    "letmein", "welcome", "monkey", "dragon", "sunshine", "princess",
+    "master", "shadow", "superman", "batman", "trustno1", "football",
+    "baseball", "soccer", "starwars", "whatever", "hello123",
+})
+
+
+def _pw_sha1(password: str) -> str:
+    """Uppercase hex SHA-1 of the password, as HIBP expects it."""
+    return hashlib.sha1(password.encode("utf-8")).hexdigest().upper()
+
+
+# Re-checks of the same string (live typing, audits) recompute a ~μs hash;
+# memoizing it would keep plaintext passwords alive as cache keys, so the
+# cache is opt-in and off by default.
+if os.getenv("SEKURE_HIBP_SHA1_CACHE") == "1":
+    _pw_sha1 = lru_cache(maxsize=256)(_pw_sha1)
+
+
+# Each 5-char prefix covers ~800 leaked hashes, so responses are highly
+# reusable across checks (imports, audits, retyped passwords). An hour of
+# TTL trades negligible staleness for zero network calls on a hit.
+_HIBP_CACHE = TTLCache(maxsize=4096, ttl=3600)
+
+
+# One client for all HIBP calls: keep-alive and TLS session reuse mean
+# repeat range queries skip the handshake a per-call AsyncClient pays.
+# Created lazily so importing this module never opens sockets; closed from
+# the app's lifespan shutdown.
+_HIBP_CLIENT: httpx.AsyncClient | None = None
+
+
+def _get_hibp_client() -> httpx.AsyncClient:
+    global _HIBP_CLIENT
+    if _HIBP_CLIENT is None or _HIBP_CLIENT.is_closed:
+        _HIBP_CLIENT = httpx.AsyncClient(
+            base_url="https://api.pwnedpasswords.com",
+            headers={"User-Agent": "Sekure-PasswordManager"},
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=10),
+        )
+    return _HIBP_CLIENT
+
+
+async def close_hibp_client() -> None:
+    """Close the shared HIBP client (called on application shutdown)."""
+    if _HIBP_CLIENT is not None and not _HIBP_CLIENT.is_closed:
+        await _HIBP_CLIENT.aclose()
+
+
+# In-flight range requests, keyed by prefix. Concurrent checks that miss
+# the cache on the same prefix await the first caller's future instead of
+# issuing duplicate HTTP requests (single-flight).
+_INFLIGHT: dict[str, asyncio.Future] = {}
+
+
+async def _fetch_range(prefix: str) -> bytes | None:
+    """Fetch the HIBP k-anonymity range for a SHA-1 prefix, with caching.
+
+    Returns the raw response body as bytes (the API is pure ASCII, so
+    decoding it would only copy ~35 KB per call), or None when the API
+    is unavailable. Concurrent calls for the same prefix are coalesced
+    into one request.
+    """
+    cached = _HIBP_CACHE.get(prefix)
+    if cached is not None:
+        return cached
+
+    inflight = _INFLIGHT.get(prefix)
+    if inflight is not None:
+        return await asyncio.shield(inflight)
+
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    _INFLIGHT[prefix] = future
+    body: bytes | None = None
+    try:
+        response = await _get_hibp_client().get(f"/range/{prefix}")
+        if response.status_code == 200:
+            body = response.content
+            _HIBP_CACHE[prefix] = body
+    except Exception:
+        # If API call fails, treat as unknown (don't block the check)
+        pass
+    finally:
+        # Resolve even on cancellation so shielded waiters never hang.
+        del _INFLIGHT[prefix]
+        future.set_result(body)
+    return body
+
+
 async def check_hibp(password: str) -> tuple[bool, int]:
     """
     Check if password has been breached using Have I Been Pwned API.
     Uses k-anonymity model (only sends first 5 chars of SHA-1 hash).
+    Trivially common passwords are caught locally without calling the API
+    (breach count is reported as 0 in that case).
     """
-    sha1 = hashlib.sha1(password.encode("utf-8")).hexdigest().upper()
+    if password.lower() in _COMMON_BREACHED:
+        return True, 0
+
+    sha1 = _pw_sha1(password)
     prefix = sha1[:5]
     suffix = sha1[5:]
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://api.pwnedpasswords.com/range/{prefix}",
-                headers={"User-Agent": "Sekure-PasswordManager"},
-                timeout=10.0,
-            )
-
-            if response.status_code == 200:
-                for line in response.text.splitlines():
-                    hash_suffix, count = line.split(":")
-                    if hash_suffix.strip() == suffix:
-                        return True, int(count.strip())
-            return False, 0
-    except Exception:
-        # If API call fails, return unknown (don't block the check)
+    body = await _fetch_range(prefix)
+    if body is None:
         return False, 0
+    # One anchored substring search instead of splitting ~800 lines: the
+    # suffix can only appear at line start, so look for b"\n<suffix>:" (or
+    # the same marker opening the body), then parse just that line's count.
+    # Staying on bytes skips decoding the whole response.
+    marker = b"\n" + suffix.encode("ascii") + b":"
+    if body.startswith(marker[1:]):
+        start = len(marker) - 1
+    else:
+        idx = body.find(marker)
+        if idx == -1:
+            return False, 0
+        start = idx + len(marker)
+    end = body.find(b"\n", start)
+    count = body[start : end if end != -1 else None]
+    return True, int(count)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import datetime
 
@@ -31,8 +31,7 @@ class TagOut(BaseModel):
     name: str
     color: str
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # --- Password Generation ---
@@ -107,8 +106,7 @@ class VaultEntryOut(BaseModel):
     updated_at: datetime
     tags: list[TagOut]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class VaultEntryEncrypted(VaultEntryOut):
@@ -127,8 +125,7 @@ class GroupMemberOut(BaseModel):
     username: str
     joined_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class GroupOut(BaseModel):
@@ -139,8 +136,7 @@ class GroupOut(BaseModel):
     created_at: datetime
     members: list[GroupMemberOut]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class GroupInvite(BaseModel):
@@ -155,8 +151,7 @@ class GroupInvitationOut(BaseModel):
     status: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class GroupPasswordCreate(BaseModel):
@@ -189,8 +184,7 @@ class GroupPasswordOut(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class GroupPasswordEncrypted(GroupPasswordOut):
@@ -214,8 +208,7 @@ class KidsAccountOut(BaseModel):
     username: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # --- Profile ---
@@ -1,19 +1,32 @@
-import urllib.request
+import asyncio
+import httpx
 
-url = "https://sekure-woad.vercel.app/api/share"
-req = urllib.request.Request(url, method="OPTIONS", headers={
-    "Origin": "http://localhost:5173",
-    "Access-Control-Request-Method": "POST",
-    "Access-Control-Request-Headers": "authorization,content-type"
-})
+URL = "https://sekure-woad.vercel.app/api/share"
+ORIGINS = [
+    "http://localhost:5173",
+    "https://sekure-woad.vercel.app",
+]
 
-try:
-    with urllib.request.urlopen(req) as response:
-        print("Status", response.status)
-        print("Headers:")
+
+async def check_preflight(client: httpx.AsyncClient, origin: str):
+    try:
+        response = await client.options(URL, headers={
+            "Origin": origin,
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "authorization,content-type",
+        })
+        print(f"[{origin}] Status {response.status_code}")
         for k, v in response.headers.items():
-            print(f"{k}: {v}")
-except urllib.error.HTTPError as e:
-    print(f"HTTP Error {e.code}: {e.read().decode()}")
-except Exception as e:
-    print("Error:", e)
+            print(f"[{origin}] {k}: {v}")
+    except Exception as e:
+        print(f"[{origin}] Error:", e)
+
+
+async def main():
+    # One shared client, all origins checked in parallel.
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        await asyncio.gather(*[check_preflight(client, origin) for origin in ORIGINS])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,20 +1,34 @@
-import urllib.request
-import json
+import asyncio
+import httpx
 
-url = "https://sekure-woad.vercel.app/api/share"
-data = json.dumps({
-    "encrypted_data": "test",
-    "iv": "test",
-    "expires_in": "1h",
-    "access_mode": "anyone",
-    "allowed_usernames": []
-}).encode("utf-8")
+URL = "https://sekure-woad.vercel.app/api/share"
+PAYLOADS = [
+    {
+        "encrypted_data": "test",
+        "iv": "test",
+        "expires_in": "1h",
+        "access_mode": "anyone",
+        "allowed_usernames": [],
+    },
+]
 
-req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
-try:
-    with urllib.request.urlopen(req) as response:
-        print("Success:", response.read().decode())
-except urllib.error.HTTPError as e:
-    print(f"HTTP Error {e.code}: {e.read().decode()}")
-except Exception as e:
-    print("Error:", e)
+
+async def check_share(client: httpx.AsyncClient, payload: dict):
+    try:
+        response = await client.post(URL, json=payload)
+        if response.status_code < 400:
+            print("Success:", response.text)
+        else:
+            print(f"HTTP Error {response.status_code}: {response.text}")
+    except Exception as e:
+        print("Error:", e)
+
+
+async def main():
+    # One shared client; payload variants go out in parallel.
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        await asyncio.gather(*[check_share(client, payload) for payload in PAYLOADS])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())